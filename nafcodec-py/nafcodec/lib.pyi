@@ -1,5 +1,5 @@
 import os
-from typing import Union, Iterator, Optional, BinaryIO
+from typing import Union, Iterator, List, Literal, Optional, BinaryIO, Tuple
 
 __version__: str
 __author__: str
@@ -10,8 +10,29 @@ class Record:
     sequence: Optional[str]
     quality: Optional[str]
     length: Optional[int]
+    @property
+    def sequence_bytes(self) -> Optional[bytes]: ...
+    def __copy__(self) -> Record: ...
+    def base_counts(self) -> Tuple[int, int, int, int]: ...
+    def mask_runs(self) -> List[Tuple[int, bool]]: ...
+    def case_segment(self, start: int, end: int) -> Literal["upper", "lower", "mixed"]: ...
 
 class Decoder(Iterator[Record]):
-    def __init__(self, file: Union[os.PathLike[str], BinaryIO]) -> None: ...
+    def __init__(
+        self,
+        file: Union[str, os.PathLike[str], BinaryIO, bytes, bytearray, memoryview],
+        *,
+        sequence: bool = True,
+        quality: bool = True,
+        mask: bool = True,
+        threads: int = 0,
+    ) -> None: ...
     def __iter__(self) -> Decoder: ...
     def __next__(self) -> Record: ...
+    def __length_hint__(self) -> int: ...
+    def read_batch(self, n: int = 1024) -> List[Record]: ...
+    def iter_inplace(self) -> InplaceIterator: ...
+
+class InplaceIterator(Iterator[Record]):
+    def __iter__(self) -> InplaceIterator: ...
+    def __next__(self) -> Record: ...
@@ -4,18 +4,23 @@ extern crate nafcodec;
 extern crate pyo3;
 
 mod pyfile;
+mod scan;
+use self::pyfile::PyBufferRead;
 use self::pyfile::PyFileRead;
 use self::pyfile::PyFileWrapper;
 
 use std::io::BufReader;
 use std::ops::DerefMut;
 
+use pyo3::buffer::PyBuffer;
 use pyo3::exceptions::PyFileNotFoundError;
 use pyo3::exceptions::PyIsADirectoryError;
 use pyo3::exceptions::PyOSError;
 use pyo3::exceptions::PyUnicodeError;
 use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
+use pyo3::types::PyBytes;
+use pyo3::types::PyList;
 use pyo3::types::PyString;
 
 /// Convert a `nafcodec::error::Error` into a Python exception.
@@ -56,7 +61,7 @@ fn convert_error(_py: Python, error: nafcodec::error::Error, path: Option<&str>)
 
 /// A single sequence record stored in a Nucleotide Archive Format file.
 #[pyclass(module = "nafcodec.lib")]
-#[derive(Clone, Debug)]
+#[derive(Clone, Debug, Default)]
 pub struct Record {
     /// `str` or `None`: The record identifier.
     #[pyo3(get, set)]
@@ -75,12 +80,12 @@ pub struct Record {
     length: Option<u64>,
 }
 
-impl pyo3::conversion::IntoPy<Record> for nafcodec::Record {
+impl pyo3::conversion::IntoPy<Record> for &nafcodec::Record {
     fn into_py(self, py: Python<'_>) -> Record {
-        let id = self.id.map(|x| PyString::new(py, &x).into());
-        let sequence = self.sequence.map(|x| PyString::new(py, &x).into());
-        let comment = self.comment.map(|x| PyString::new(py, &x).into());
-        let quality = self.quality.map(|x| PyString::new(py, &x).into());
+        let id = self.id.as_ref().map(|x| PyString::new(py, x).into());
+        let sequence = self.sequence.as_ref().map(|x| PyString::new(py, x).into());
+        let comment = self.comment.as_ref().map(|x| PyString::new(py, x).into());
+        let quality = self.quality.as_ref().map(|x| PyString::new(py, x).into());
         let length = self.length;
         Record {
             id,
@@ -92,39 +97,174 @@ impl pyo3::conversion::IntoPy<Record> for nafcodec::Record {
     }
 }
 
+impl Record {
+    /// Get the record sequence, or raise a `ValueError` if there is none.
+    fn sequence_str<'py>(&self, py: Python<'py>) -> PyResult<&'py str> {
+        match &self.sequence {
+            Some(sequence) => sequence.as_ref(py).to_str(),
+            None => Err(PyValueError::new_err("record has no sequence")),
+        }
+    }
+}
+
+#[pymethods]
+impl Record {
+    fn __copy__(&self) -> Self {
+        self.clone()
+    }
+
+    /// `bytes` or `None`: The record sequence, encoded as UTF-8.
+    #[getter]
+    fn sequence_bytes<'py>(&self, py: Python<'py>) -> PyResult<Option<&'py PyBytes>> {
+        match &self.sequence {
+            Some(sequence) => {
+                let s = sequence.as_ref(py).to_str()?;
+                Ok(Some(PyBytes::new(py, s.as_bytes())))
+            }
+            None => Ok(None),
+        }
+    }
+
+    /// Count the occurrences of each nucleotide in the record sequence.
+    ///
+    /// Returns:
+    ///     `tuple` of `int`: The number of ``A``, ``C``, ``G`` and ``T``
+    ///     characters in the sequence, computed in a single pass.
+    ///
+    /// Raises:
+    ///     `ValueError`: When the record has no sequence.
+    ///
+    fn base_counts(&self, py: Python) -> PyResult<(u64, u64, u64, u64)> {
+        let s = self.sequence_str(py)?;
+        Ok(self::scan::count_bases(s.as_bytes()))
+    }
+
+    /// Compute the runs of masked and unmasked regions in the sequence.
+    ///
+    /// Returns:
+    ///     `list` of `tuple`: A list of ``(end, masked)`` tuples, where
+    ///     ``end`` is the exclusive end position of each run, and
+    ///     ``masked`` tells whether the run is in lowercase.
+    ///
+    /// Raises:
+    ///     `ValueError`: When the record has no sequence.
+    ///
+    fn mask_runs(&self, py: Python) -> PyResult<Vec<(usize, bool)>> {
+        let s = self.sequence_str(py)?;
+        Ok(self::scan::mask_runs(s))
+    }
+
+    /// Get the case of the letters in a segment of the sequence.
+    ///
+    /// Arguments:
+    ///     start (`int`): The start position of the segment.
+    ///     end (`int`): The (exclusive) end position of the segment.
+    ///
+    /// Returns:
+    ///     `str`: ``"upper"`` if the segment contains only uppercase
+    ///     letters, ``"lower"`` if it contains only lowercase letters,
+    ///     or ``"mixed"`` otherwise, following `str.isupper` and
+    ///     `str.islower` semantics.
+    ///
+    /// Raises:
+    ///     `ValueError`: When the record has no sequence.
+    ///
+    fn case_segment(&self, py: Python, start: usize, end: usize) -> PyResult<&'static str> {
+        use self::scan::Case;
+        let s = self.sequence_str(py)?;
+        match self::scan::case_segment(s, start, end) {
+            Case::Upper => Ok("upper"),
+            Case::Lower => Ok("lower"),
+            Case::Mixed => Ok("mixed"),
+        }
+    }
+}
+
 /// A streaming decoder to read a Nucleotide Archive Format file.
+///
+/// Arguments:
+///     file (`str`, `os.PathLike`, file-like or bytes-like object): The
+///         path to the archive to read, a file-like object opened in
+///         binary mode, or an object exposing the archive contents with
+///         the buffer protocol (such as `bytes` or `memoryview`).
+///
+/// Keyword Arguments:
+///     sequence (`bool`): Whether to decode the record sequences. Pass
+///         `False` to skip the sequence block entirely when sequences
+///         are not needed.
+///     quality (`bool`): Whether to decode the record qualities, if
+///         any are stored in the archive.
+///     mask (`bool`): Whether to mask the sequence regions marked in
+///         the archive as lowercase letters.
+///     threads (`int`): The number of background threads to use for
+///         decompressing the archive blocks in parallel. Pass ``0`` to
+///         decompress everything in the calling thread.
+///
 #[pyclass(module = "nafcodec.lib")]
 pub struct Decoder {
-    decoder: nafcodec::Decoder<'static, BufReader<PyFileWrapper>>,
+    decoder: nafcodec::Decoder<'static, PyFileWrapper>,
+    /// A record reused to decode the archive, to avoid per-record allocations.
+    buffer: nafcodec::Record,
+}
+
+impl Decoder {
+    /// Open the archive at the given path without going through Python.
+    fn open_path(
+        py: Python,
+        builder: &nafcodec::DecoderBuilder,
+        path: &str,
+    ) -> PyResult<nafcodec::Decoder<'static, PyFileWrapper>> {
+        let reader = std::fs::File::open(path)
+            .map_err(nafcodec::error::Error::Io)
+            .map_err(|e| convert_error(py, e, Some(path)))
+            .map(BufReader::new)
+            .map(PyFileWrapper::File)?;
+        builder
+            .from_reader(reader)
+            .map_err(|e| convert_error(py, e, Some(path)))
+    }
 }
 
 #[pymethods]
 impl Decoder {
     #[new]
-    fn __init__(file: &PyAny) -> PyResult<PyClassInitializer<Self>> {
+    #[pyo3(signature = (file, *, sequence = true, quality = true, mask = true, threads = 0))]
+    fn __init__(
+        file: &PyAny,
+        sequence: bool,
+        quality: bool,
+        mask: bool,
+        threads: usize,
+    ) -> PyResult<PyClassInitializer<Self>> {
         let py = file.py();
-        let decoder = match PyFileRead::from_ref(file) {
-            Ok(handle) => {
-                let wrapper = PyFileWrapper::PyFile(handle);
-                nafcodec::Decoder::new(std::io::BufReader::new(wrapper))
-                    .map_err(|e| convert_error(py, e, None))?
-            }
-            Err(_e) => {
-                let path = py
-                    .import("os")?
-                    .call_method1(pyo3::intern!(py, "fspath"), (file,))?
-                    .downcast::<PyString>()?;
-                let path_str = path.to_str()?;
-                let reader = std::fs::File::open(path_str)
-                    .map_err(nafcodec::error::Error::Io)
-                    .map_err(|e| convert_error(py, e, Some(path_str)))
-                    .map(PyFileWrapper::File)?;
-                nafcodec::Decoder::new(std::io::BufReader::new(reader))
-                    .map_err(|e| convert_error(py, e, Some(path_str)))?
-            }
+        let mut builder = nafcodec::DecoderBuilder::new();
+        builder.sequence(sequence);
+        builder.quality(quality);
+        builder.mask(mask);
+        builder.threads(threads);
+
+        let decoder = if let Ok(path) = file.downcast::<PyString>() {
+            Self::open_path(py, &builder, path.to_str()?)?
+        } else if let Ok(buffer) = PyBuffer::<u8>::get(file) {
+            let wrapper = PyFileWrapper::Buffer(PyBufferRead::new(buffer)?);
+            builder
+                .from_reader(wrapper)
+                .map_err(|e| convert_error(py, e, None))?
+        } else if let Ok(handle) = PyFileRead::from_ref(file) {
+            let wrapper = PyFileWrapper::PyFile(BufReader::new(handle));
+            builder
+                .from_reader(wrapper)
+                .map_err(|e| convert_error(py, e, None))?
+        } else {
+            let path = py
+                .import("os")?
+                .call_method1(pyo3::intern!(py, "fspath"), (file,))?
+                .downcast::<PyString>()?;
+            Self::open_path(py, &builder, path.to_str()?)?
         };
 
-        Ok(Decoder { decoder }.into())
+        let buffer = nafcodec::Record::default();
+        Ok(Decoder { decoder, buffer }.into())
     }
 
     fn __iter__(slf: PyRefMut<'_, Self>) -> PyResult<PyRefMut<'_, Self>> {
@@ -132,15 +272,65 @@ impl Decoder {
     }
 
     fn __next__(mut slf: PyRefMut<'_, Self>) -> PyResult<Option<Record>> {
-        let result = slf.deref_mut().decoder.next().transpose();
         let py = slf.py();
-        match result {
-            Ok(None) => Ok(None),
-            Ok(Some(record)) => Ok(Some(record.into_py(py))),
-            Err(e) => Err(convert_error(py, e, None)),
+        let decoder = slf.deref_mut();
+        match decoder.decoder.next_into(&mut decoder.buffer) {
+            None => Ok(None),
+            Some(Ok(())) => Ok(Some((&decoder.buffer).into_py(py))),
+            Some(Err(e)) => Err(convert_error(py, e, None)),
         }
     }
 
+    fn __length_hint__(slf: PyRef<'_, Self>) -> usize {
+        slf.decoder.size_hint().0
+    }
+
+    /// Read several records from the archive at once.
+    ///
+    /// Arguments:
+    ///     n (`int`): The maximum number of records to read.
+    ///
+    /// Returns:
+    ///     `list` of `Record`: The records decoded from the archive,
+    ///     which may be less than ``n`` when the end of the archive is
+    ///     reached, or empty if all records were already read.
+    ///
+    #[pyo3(signature = (n = 1024))]
+    fn read_batch(mut slf: PyRefMut<'_, Self>, n: usize) -> PyResult<Py<PyList>> {
+        let py = slf.py();
+        let decoder = slf.deref_mut();
+        let remaining = decoder.decoder.size_hint().0;
+        let mut records = Vec::with_capacity(n.min(remaining));
+        while records.len() < n {
+            match decoder.decoder.next_into(&mut decoder.buffer) {
+                None => break,
+                Some(Ok(())) => {
+                    let record: Record = (&decoder.buffer).into_py(py);
+                    records.push(Py::new(py, record)?);
+                }
+                Some(Err(e)) => return Err(convert_error(py, e, None)),
+            }
+        }
+        Ok(PyList::new(py, records).into())
+    }
+
+    /// Iterate over the remaining records, reusing a single `Record`.
+    ///
+    /// The same `Record` object is yielded at every iteration, with its
+    /// fields replaced by the values of the next record. This avoids
+    /// creating a new object for each record when records are processed
+    /// one at a time. Use `copy.copy` to keep a record after the iterator
+    /// has been advanced.
+    ///
+    fn iter_inplace(slf: PyRef<'_, Self>) -> PyResult<InplaceIterator> {
+        let py = slf.py();
+        let record = Py::new(py, Record::default())?;
+        Ok(InplaceIterator {
+            decoder: slf.into(),
+            record,
+        })
+    }
+
     #[getter]
     fn sequence_type(slf: PyRef<'_, Self>) -> &str {
         use nafcodec::SequenceType;
@@ -153,6 +343,35 @@ impl Decoder {
     }
 }
 
+/// An iterator over the records of a `Decoder` reusing a single `Record`.
+#[pyclass(module = "nafcodec.lib")]
+pub struct InplaceIterator {
+    decoder: Py<Decoder>,
+    record: Py<Record>,
+}
+
+#[pymethods]
+impl InplaceIterator {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(slf: PyRef<'_, Self>) -> PyResult<Option<Py<Record>>> {
+        let py = slf.py();
+        let mut cell = slf.decoder.as_ref(py).try_borrow_mut()?;
+        let decoder = cell.deref_mut();
+        match decoder.decoder.next_into(&mut decoder.buffer) {
+            None => Ok(None),
+            Some(Ok(())) => {
+                let mut record = slf.record.as_ref(py).try_borrow_mut()?;
+                *record = (&decoder.buffer).into_py(py);
+                Ok(Some(slf.record.clone_ref(py)))
+            }
+            Some(Err(e)) => Err(convert_error(py, e, None)),
+        }
+    }
+}
+
 /// An encoder/decoder for Nucleotide Archive Format files.
 #[pymodule]
 #[pyo3(name = "lib")]
@@ -163,6 +382,7 @@ pub fn init(_py: Python, m: &PyModule) -> PyResult<()> {
 
     m.add_class::<Decoder>()?;
     m.add_class::<Record>()?;
+    m.add_class::<InplaceIterator>()?;
 
     Ok(())
 }
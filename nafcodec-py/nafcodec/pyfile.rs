@@ -1,9 +1,13 @@
 use std::fs::File;
+use std::io::BufRead;
+use std::io::BufReader;
 use std::io::Error as IoError;
 use std::io::Read;
 use std::io::Seek;
 use std::io::SeekFrom;
 
+use pyo3::buffer::PyBuffer;
+use pyo3::exceptions::PyBufferError;
 use pyo3::exceptions::PyOSError;
 use pyo3::exceptions::PyTypeError;
 use pyo3::prelude::*;
@@ -187,9 +191,83 @@ impl Seek for PyFileRead {
 
 // ---------------------------------------------------------------------------
 
+/// A reader over the contents of an object implementing the buffer protocol.
+///
+/// The buffer is accessed in place, without copying its contents, and is
+/// kept alive and locked by the `PyBuffer` until the reader is dropped.
+pub struct PyBufferRead {
+    buffer: PyBuffer<u8>,
+    position: usize,
+}
+
+impl PyBufferRead {
+    pub fn new(buffer: PyBuffer<u8>) -> PyResult<Self> {
+        if buffer.is_c_contiguous() {
+            Ok(Self {
+                buffer,
+                position: 0,
+            })
+        } else {
+            Err(PyBufferError::new_err("expected a contiguous buffer"))
+        }
+    }
+
+    fn as_slice(&self) -> &[u8] {
+        // SAFETY: the buffer is contiguous, and holding the `PyBuffer`
+        //         prevents the exporter from releasing or resizing it.
+        unsafe {
+            std::slice::from_raw_parts(self.buffer.buf_ptr() as *const u8, self.buffer.len_bytes())
+        }
+    }
+}
+
+impl Read for PyBufferRead {
+    fn read(&mut self, buf: &mut [u8]) -> Result<usize, IoError> {
+        let available = self.fill_buf()?;
+        let n = buf.len().min(available.len());
+        buf[..n].copy_from_slice(&available[..n]);
+        self.consume(n);
+        Ok(n)
+    }
+}
+
+impl BufRead for PyBufferRead {
+    fn fill_buf(&mut self) -> Result<&[u8], IoError> {
+        let data = self.as_slice();
+        Ok(&data[self.position.min(data.len())..])
+    }
+
+    fn consume(&mut self, amt: usize) {
+        self.position += amt;
+    }
+}
+
+impl Seek for PyBufferRead {
+    fn seek(&mut self, seek: SeekFrom) -> Result<u64, IoError> {
+        let (base, offset) = match seek {
+            SeekFrom::Start(n) => (0, n as i64),
+            SeekFrom::Current(n) => (self.position as i64, n),
+            SeekFrom::End(n) => (self.buffer.len_bytes() as i64, n),
+        };
+        match base.checked_add(offset) {
+            Some(n) if n >= 0 => {
+                self.position = n as usize;
+                Ok(n as u64)
+            }
+            _ => Err(IoError::new(
+                std::io::ErrorKind::InvalidInput,
+                "invalid seek to a negative or overflowing position",
+            )),
+        }
+    }
+}
+
+// ---------------------------------------------------------------------------
+
 pub enum PyFileWrapper {
-    PyFile(PyFileRead),
-    File(File),
+    PyFile(BufReader<PyFileRead>),
+    File(BufReader<File>),
+    Buffer(PyBufferRead),
 }
 
 impl Read for PyFileWrapper {
@@ -197,6 +275,25 @@ impl Read for PyFileWrapper {
         match self {
             PyFileWrapper::PyFile(r) => r.read(buf),
             PyFileWrapper::File(f) => f.read(buf),
+            PyFileWrapper::Buffer(b) => b.read(buf),
+        }
+    }
+}
+
+impl BufRead for PyFileWrapper {
+    fn fill_buf(&mut self) -> Result<&[u8], IoError> {
+        match self {
+            PyFileWrapper::PyFile(r) => r.fill_buf(),
+            PyFileWrapper::File(f) => f.fill_buf(),
+            PyFileWrapper::Buffer(b) => b.fill_buf(),
+        }
+    }
+
+    fn consume(&mut self, amt: usize) {
+        match self {
+            PyFileWrapper::PyFile(r) => r.consume(amt),
+            PyFileWrapper::File(f) => f.consume(amt),
+            PyFileWrapper::Buffer(b) => b.consume(amt),
         }
     }
 }
@@ -206,6 +303,7 @@ impl Seek for PyFileWrapper {
         match self {
             PyFileWrapper::PyFile(r) => r.seek(seek),
             PyFileWrapper::File(f) => f.seek(seek),
+            PyFileWrapper::Buffer(b) => b.seek(seek),
         }
     }
 }
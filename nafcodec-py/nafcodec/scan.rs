@@ -0,0 +1,213 @@
+//! Byte-level scanning of sequence data using SWAR operations.
+
+use nafcodec::swar::*;
+
+/// The case of the letters in a sequence segment.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum Case {
+    Upper,
+    Lower,
+    Mixed,
+}
+
+impl Case {
+    fn from_flags(upper: bool, lower: bool) -> Self {
+        match (upper, lower) {
+            (true, false) => Case::Upper,
+            (false, true) => Case::Lower,
+            _ => Case::Mixed,
+        }
+    }
+}
+
+/// Count the occurrences of `A`, `C`, `G` and `T` in the given sequence.
+pub fn count_bases(sequence: &[u8]) -> (u64, u64, u64, u64) {
+    let mut counts = [0u64; 4];
+
+    let mut chunks = sequence.chunks_exact(LANES);
+    for chunk in chunks.by_ref() {
+        let word = u64::from_le_bytes(chunk.try_into().unwrap());
+        for (count, base) in counts.iter_mut().zip(b"ACGT") {
+            *count += zero_bytes(word ^ splat(*base)).count_ones() as u64;
+        }
+    }
+    for byte in chunks.remainder() {
+        for (count, base) in counts.iter_mut().zip(b"ACGT") {
+            *count += (byte == base) as u64;
+        }
+    }
+
+    (counts[0], counts[1], counts[2], counts[3])
+}
+
+/// Compute the runs of lowercase and non-lowercase characters in a sequence.
+///
+/// Each run is given as the (exclusive) index where it ends, and whether
+/// it contains lowercase characters, mirroring how regions are masked in
+/// a Nucleotide Archive Format file.
+pub fn mask_runs(sequence: &str) -> Vec<(usize, bool)> {
+    let mut runs = Vec::new();
+    if !sequence.is_ascii() {
+        // slow path: indices must be computed in characters, not bytes
+        let mut length = 0;
+        let mut state = None;
+        for c in sequence.chars() {
+            let lower = c.is_lowercase();
+            match state {
+                Some(s) if s != lower => runs.push((length, s)),
+                _ => (),
+            }
+            state = Some(lower);
+            length += 1;
+        }
+        if let Some(s) = state {
+            runs.push((length, s));
+        }
+        return runs;
+    }
+
+    let bytes = sequence.as_bytes();
+    let mut state = match bytes.first() {
+        Some(x) => x.is_ascii_lowercase(),
+        None => return runs,
+    };
+
+    let mut chunks = bytes.chunks_exact(LANES);
+    for (i, chunk) in chunks.by_ref().enumerate() {
+        let word = u64::from_le_bytes(chunk.try_into().unwrap());
+        let lower = movemask(ascii_range(word, b'a', b'z'));
+        let mut changes = lower ^ ((lower << 1) | state as u8);
+        while changes != 0 {
+            runs.push((i * LANES + changes.trailing_zeros() as usize, state));
+            state = !state;
+            changes &= changes - 1;
+        }
+    }
+    let offset = bytes.len() - chunks.remainder().len();
+    for (i, x) in chunks.remainder().iter().enumerate() {
+        if x.is_ascii_lowercase() != state {
+            runs.push((offset + i, state));
+            state = !state;
+        }
+    }
+
+    runs.push((bytes.len(), state));
+    runs
+}
+
+/// Get the case of the letters in the `start..end` segment of a sequence.
+///
+/// Like `str.isupper` and `str.islower` in Python, the segment is in
+/// upper (resp. lower) case if it contains at least one cased letter and
+/// no lowercase (resp. uppercase) ones. Otherwise, including when the
+/// segment is empty, it is considered mixed. Indices are clamped to the
+/// sequence length.
+pub fn case_segment(sequence: &str, start: usize, end: usize) -> Case {
+    let end = end.min(sequence.len());
+    if !sequence.as_bytes()[..end].is_ascii() {
+        // slow path: indices must be computed in characters, not bytes
+        let mut upper = false;
+        let mut lower = false;
+        for c in sequence.chars().take(end).skip(start) {
+            upper |= c.is_uppercase();
+            lower |= c.is_lowercase();
+        }
+        return Case::from_flags(upper, lower);
+    }
+
+    let start = start.min(end);
+    let bytes = &sequence.as_bytes()[start..end];
+
+    let mut upper = 0;
+    let mut lower = 0;
+    let mut chunks = bytes.chunks_exact(LANES);
+    for chunk in chunks.by_ref() {
+        let word = u64::from_le_bytes(chunk.try_into().unwrap());
+        upper |= ascii_range(word, b'A', b'Z');
+        lower |= ascii_range(word, b'a', b'z');
+        if upper != 0 && lower != 0 {
+            return Case::Mixed;
+        }
+    }
+    let remainder = chunks.remainder();
+    Case::from_flags(
+        upper != 0 || remainder.iter().any(u8::is_ascii_uppercase),
+        lower != 0 || remainder.iter().any(u8::is_ascii_lowercase),
+    )
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn count_bases_empty() {
+        assert_eq!(count_bases(b""), (0, 0, 0, 0));
+    }
+
+    #[test]
+    fn count_bases_mixed() {
+        let sequence = b"ACGTNNACGTacgtAAAAACCCGGT-";
+        let expected = (
+            sequence.iter().filter(|&&x| x == b'A').count() as u64,
+            sequence.iter().filter(|&&x| x == b'C').count() as u64,
+            sequence.iter().filter(|&&x| x == b'G').count() as u64,
+            sequence.iter().filter(|&&x| x == b'T').count() as u64,
+        );
+        assert_eq!(count_bases(sequence), expected);
+    }
+
+    #[test]
+    fn mask_runs_empty() {
+        assert_eq!(mask_runs(""), vec![]);
+    }
+
+    #[test]
+    fn mask_runs_single() {
+        assert_eq!(mask_runs("ACGTACGTACGT"), vec![(12, false)]);
+        assert_eq!(mask_runs("acgtacgtacgt"), vec![(12, true)]);
+    }
+
+    #[test]
+    fn mask_runs_mixed() {
+        let sequence = "ACGTNNNNNNNacgtacgtnnACGTAAAAAAAAAAAAAAAAaaaaC-g";
+        let expected = vec![
+            (11, false),
+            (21, true),
+            (41, false),
+            (45, true),
+            (47, false),
+            (48, true),
+        ];
+        assert_eq!(mask_runs(sequence), expected);
+    }
+
+    #[test]
+    fn mask_runs_unicode() {
+        assert_eq!(mask_runs("ÀÉéè"), vec![(2, false), (4, true)]);
+    }
+
+    #[test]
+    fn case_segment_ascii() {
+        let sequence = "ACGTNNNNNNNacgtacgtnnACGTAAAAAAAAAAAAAAAAaaaaC-g";
+        assert_eq!(case_segment(sequence, 0, 11), Case::Upper);
+        assert_eq!(case_segment(sequence, 11, 21), Case::Lower);
+        assert_eq!(case_segment(sequence, 21, 41), Case::Upper);
+        assert_eq!(case_segment(sequence, 0, 41), Case::Mixed);
+        assert_eq!(case_segment(sequence, 45, 47), Case::Upper);
+        assert_eq!(case_segment(sequence, 46, 48), Case::Lower);
+        assert_eq!(case_segment(sequence, 46, 47), Case::Mixed);
+        assert_eq!(case_segment(sequence, 41, 100), Case::Mixed);
+        assert_eq!(case_segment(sequence, 100, 200), Case::Mixed);
+    }
+
+    #[test]
+    fn case_segment_unicode() {
+        assert_eq!(case_segment("ÀÉéè", 0, 2), Case::Upper);
+        assert_eq!(case_segment("ÀÉéè", 2, 4), Case::Lower);
+        assert_eq!(case_segment("ÀÉéè", 1, 3), Case::Mixed);
+        assert_eq!(case_segment("ACGTacgtÀÉéè", 0, 4), Case::Upper);
+        assert_eq!(case_segment("ACGTacgtÀÉéè", 6, 10), Case::Mixed);
+        assert_eq!(case_segment("ACGTacgtÀÉéè", 10, 12), Case::Lower);
+    }
+}
@@ -1,8 +1,11 @@
+import copy
 import gzip
 import io
+import operator
 import os
 import tempfile
 import unittest
+import zlib
 
 import nafcodec
 from . import data
@@ -18,9 +21,17 @@ except ImportError:
 
 class _TestDecoder(object):
 
-    def _get_decoder(self, filename):
+    def _get_decoder(self, filename, **options):
         raise NotImplementedError
 
+    def assertRecordsEqual(self, records, expected):
+        self.assertEqual(len(records), len(expected))
+        for record, expected_record in zip(records, expected):
+            self.assertEqual(record.id, expected_record.id)
+            self.assertEqual(record.comment, expected_record.comment)
+            self.assertEqual(record.sequence, expected_record.sequence)
+            self.assertEqual(record.quality, expected_record.quality)
+
     @unittest.skipUnless(files, "importlib.resources not found")
     def test_fastq(self):
         decoder = self._get_decoder("phix.naf")
@@ -28,9 +39,46 @@ class _TestDecoder(object):
         records = list(decoder)
         self.assertEqual(len(records), 42)
         self.assertEqual(records[0].id, "SRR1377138.1")
-        self.assertEqual(records[0].sequence[:36], "NGCTCTTAAACCTGCTATTGAGGCTTGTGGCATTTC")
+        self.assertEqual(records[0].sequence_bytes[:36], b"NGCTCTTAAACCTGCTATTGAGGCTTGTGGCATTTC")
         self.assertEqual(records[0].quality[:31], "#8CCCGGGGGGGGGGGGGGGGGGGGGGGGGG")
 
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_fastq_length_hint(self):
+        decoder = self._get_decoder("phix.naf")
+        self.assertEqual(operator.length_hint(decoder), 42)
+        next(decoder)
+        self.assertEqual(operator.length_hint(decoder), 41)
+        records = list(decoder)
+        self.assertEqual(len(records), 41)
+        self.assertEqual(operator.length_hint(decoder), 0)
+
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_fastq_no_quality(self):
+        decoder = self._get_decoder("phix.naf", quality=False)
+        records = list(decoder)
+        self.assertEqual(len(records), 42)
+        self.assertEqual(records[0].id, "SRR1377138.1")
+        self.assertEqual(records[0].sequence[:36], "NGCTCTTAAACCTGCTATTGAGGCTTGTGGCATTTC")
+        self.assertIs(records[0].quality, None)
+
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_fastq_threads(self):
+        expected = list(self._get_decoder("phix.naf"))
+        decoder = self._get_decoder("phix.naf", threads=4)
+        self.assertEqual(decoder.sequence_type, "dna")
+        self.assertRecordsEqual(list(decoder), expected)
+
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_fastq_read_batch(self):
+        expected = list(self._get_decoder("phix.naf"))
+        decoder = self._get_decoder("phix.naf")
+        batch = decoder.read_batch(10)
+        self.assertEqual(len(batch), 10)
+        records = batch + decoder.read_batch(1 << 20)
+        self.assertEqual(len(records), 42)
+        self.assertEqual(decoder.read_batch(), [])
+        self.assertRecordsEqual(records, expected)
+
     @unittest.skipUnless(files, "importlib.resources not found")
     def test_dna(self):
         decoder = self._get_decoder("NZ_AAEN01000029.naf")
@@ -38,10 +86,12 @@ class _TestDecoder(object):
         records = list(decoder)
         self.assertEqual(len(records), 30)
         self.assertEqual(records[0].id, "NZ_AAEN01000029.1")
-        self.assertEqual(records[0].sequence.count('A'), 62115)
-        self.assertEqual(records[0].sequence.count('C'), 28747)
-        self.assertEqual(records[0].sequence.count('G'), 30763)
-        self.assertEqual(records[0].sequence.count('T'), 61152)
+        a, c, g, t = records[0].base_counts()
+        self.assertEqual(a, 62115)
+        self.assertEqual(c, 28747)
+        self.assertEqual(g, 30763)
+        self.assertEqual(t, 61152)
+        self.assertEqual(zlib.crc32(records[0].sequence_bytes), 0xACA605AB)
         self.assertIs(records[0].quality, None)
 
     @unittest.skipUnless(files, "importlib.resources not found")
@@ -52,11 +102,37 @@ class _TestDecoder(object):
         self.assertEqual(len(records), 12)
         self.assertEqual(records[0].id, "sp|P19841|LUXC_PHOPO")
         self.assertEqual(records[0].sequence[:25], "MCNAEFKGDCMIKKIPMIIGGAERD")
+        self.assertEqual(zlib.crc32(records[0].sequence_bytes), 0x5663948C)
         self.assertIs(records[0].quality, None)
         self.assertEqual(records[5].id, "sp|P29236|LUXC2_PHOLE")
         self.assertEqual(records[5].sequence[:25], "MIKKIPMIIGGVVQNTSGYGMRELT")
+        self.assertEqual(zlib.crc32(records[5].sequence_bytes), 0xD06743BC)
         self.assertIs(records[5].quality, None)
 
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_protein_no_sequence(self):
+        decoder = self._get_decoder("LuxC.naf", sequence=False)
+        records = list(decoder)
+        self.assertEqual(len(records), 12)
+        self.assertEqual(records[0].id, "sp|P19841|LUXC_PHOPO")
+        self.assertIs(records[0].sequence, None)
+        self.assertEqual(records[5].id, "sp|P29236|LUXC2_PHOLE")
+        self.assertIs(records[5].sequence, None)
+
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_protein_iter_inplace(self):
+        expected = list(self._get_decoder("LuxC.naf"))
+        decoder = self._get_decoder("LuxC.naf")
+        iterator = decoder.iter_inplace()
+        self.assertIsInstance(iterator, nafcodec.lib.InplaceIterator)
+        objects = set()
+        records = []
+        for record in iterator:
+            objects.add(id(record))
+            records.append(copy.copy(record))
+        self.assertEqual(len(objects), 1)
+        self.assertRecordsEqual(records, expected)
+
     @unittest.skipUnless(files, "importlib.resources not found")
     def test_dna_masked(self):
         decoder = self._get_decoder("masked.naf")
@@ -64,34 +140,73 @@ class _TestDecoder(object):
         records = list(decoder)
         self.assertEqual(len(records), 2)
         self.assertEqual(records[0].id, "test1")
-        self.assertTrue(records[0].sequence[:657].isupper())
-        self.assertTrue(records[0].sequence[657:676].islower())
-        self.assertTrue(records[0].sequence[676:1311].isupper())
-        self.assertTrue(records[0].sequence[1311:1350].islower())
+        self.assertEqual(
+            records[0].mask_runs()[:4],
+            [(657, False), (676, True), (1311, False), (1350, True)],
+        )
+        self.assertEqual(records[1].id, "test2")
+        self.assertEqual(records[1].case_segment(0, 525), "upper")
+        self.assertEqual(records[1].case_segment(525, 621), "lower")
+        self.assertEqual(records[1].case_segment(621, 720), "upper")
+        self.assertEqual(records[1].case_segment(720, 733), "lower")
+        self.assertEqual(records[1].case_segment(0, 733), "mixed")
         self.assertIs(records[0].quality, None)
 
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_dna_no_mask(self):
+        decoder = self._get_decoder("masked.naf", mask=False)
+        records = list(decoder)
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].mask_runs(), [(len(records[0].sequence), False)])
+        self.assertEqual(records[1].mask_runs(), [(len(records[1].sequence), False)])
+
 
 class TestDecoderHandle(_TestDecoder, unittest.TestCase):
 
-    def _get_decoder(self, filename):
-        with files(data).joinpath(filename).open("rb") as f:
-            content = f.read()
-        handle = io.BytesIO(content)
-        return nafcodec.Decoder(handle)
+    @classmethod
+    def setUpClass(cls):
+        cls._fixtures = {}
+        if files is not None:
+            for filename in ("phix.naf", "LuxC.naf", "masked.naf", "NZ_AAEN01000029.naf"):
+                cls._fixtures[filename] = files(data).joinpath(filename).read_bytes()
 
+    def _get_decoder(self, filename, **options):
+        handle = io.BytesIO(self._fixtures[filename])
+        return nafcodec.Decoder(handle, **options)
 
-class TestDecoderFile(_TestDecoder, unittest.TestCase):
-    
-    def setUp(self):
-        self.handle = None
 
-    def tearDown(self):
-        if self.handle is not None:
-            self.handle.close()
+class TestDecoderBuffer(TestDecoderHandle):
+
+    def _get_decoder(self, filename, **options):
+        return nafcodec.Decoder(memoryview(self._fixtures[filename]), **options)
+
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_bytes(self):
+        expected = list(self._get_decoder("LuxC.naf"))
+        decoder = nafcodec.Decoder(self._fixtures["LuxC.naf"])
+        self.assertEqual(decoder.sequence_type, "protein")
+        self.assertRecordsEqual(list(decoder), expected)
+
+    @unittest.skipUnless(files, "importlib.resources not found")
+    def test_error_noncontiguous(self):
+        view = memoryview(self._fixtures["LuxC.naf"])[::2]
+        with self.assertRaises(BufferError):
+            decoder = nafcodec.Decoder(view)
+
+
+class TestDecoderPath(_TestDecoder, unittest.TestCase):
+
+    def _get_decoder(self, filename, **options):
+        path = os.fspath(files(data).joinpath(filename))
+        return nafcodec.Decoder(path, **options)
+
+
+class TestDecoderFile(_TestDecoder, unittest.TestCase):
 
-    def _get_decoder(self, filename):
-        self.handle = files(data).joinpath(filename).open("rb")
-        return nafcodec.Decoder(self.handle)
+    def _get_decoder(self, filename, **options):
+        handle = files(data).joinpath(filename).open("rb")
+        self.addCleanup(handle.close)
+        return nafcodec.Decoder(handle, **options)
 
     def test_error_filenotfound(self):
         with self.assertRaises(FileNotFoundError):
@@ -100,4 +215,4 @@ class TestDecoderFile(_TestDecoder, unittest.TestCase):
     @unittest.skipIf(os.name == "nt", "Windows error codes differ")
     def test_error_isadirectory(self):
         with self.assertRaises(IsADirectoryError):
-            decoder = nafcodec.Decoder(os.path.dirname(__file__))
\ No newline at end of file
+            decoder = nafcodec.Decoder(os.path.dirname(__file__))
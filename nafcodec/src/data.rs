@@ -21,7 +21,7 @@ pub enum MaskUnit {
 /// secondary structure in dot-bracket notation, or protein secondary
 /// structure.
 ///
-#[derive(Debug, Clone, Default)]
+#[derive(Debug, Clone, Default, PartialEq)]
 pub struct Record {
     /// The record identifier (accession number).
     pub id: Option<String>,
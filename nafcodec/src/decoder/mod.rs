@@ -2,6 +2,7 @@ use std::fmt::Debug;
 use std::fs::File;
 use std::io::BufRead;
 use std::io::BufReader;
+use std::io::Read;
 use std::io::Seek;
 use std::io::SeekFrom;
 use std::iter::FusedIterator;
@@ -11,18 +12,54 @@ use std::sync::RwLock;
 mod ioslice;
 mod parser;
 mod reader;
+mod worker;
 
 use self::ioslice::IoSlice;
 use self::reader::*;
+use self::worker::WorkerReader;
 use super::Rc;
 use crate::data::Header;
 use crate::data::MaskUnit;
 use crate::data::Record;
 use crate::data::SequenceType;
 use crate::error::Error;
+use crate::swar;
 
 /// The wrapper used to decode Zstandard stream.
-type ZstdDecoder<'z, R> = BufReader<zstd::Decoder<'z, BufReader<IoSlice<R>>>>;
+type ZstdDecoder<'z, R> = BlockReader<'z, R>;
+
+/// A reader for the decompressed contents of a single block.
+enum BlockReader<'z, R: BufRead + Seek> {
+    /// A block decompressed on demand from the shared reader.
+    Stream(BufReader<zstd::Decoder<'z, BufReader<IoSlice<R>>>>),
+    /// A block decompressed ahead of time in a background thread.
+    Worker(WorkerReader),
+}
+
+impl<R: BufRead + Seek> Read for BlockReader<'_, R> {
+    fn read(&mut self, buf: &mut [u8]) -> Result<usize, std::io::Error> {
+        match self {
+            BlockReader::Stream(r) => r.read(buf),
+            BlockReader::Worker(r) => r.read(buf),
+        }
+    }
+}
+
+impl<R: BufRead + Seek> BufRead for BlockReader<'_, R> {
+    fn fill_buf(&mut self) -> Result<&[u8], std::io::Error> {
+        match self {
+            BlockReader::Stream(r) => r.fill_buf(),
+            BlockReader::Worker(r) => r.fill_buf(),
+        }
+    }
+
+    fn consume(&mut self, amt: usize) {
+        match self {
+            BlockReader::Stream(r) => r.consume(amt),
+            BlockReader::Worker(r) => r.consume(amt),
+        }
+    }
+}
 
 /// A builder to configure and initialize a [`Decoder`](./struct.Decoder.html).
 ///
@@ -41,6 +78,7 @@ type ZstdDecoder<'z, R> = BufReader<zstd::Decoder<'z, BufReader<IoSlice<R>>>>;
 #[derive(Debug, Clone)]
 pub struct DecoderBuilder {
     buffer_size: usize,
+    threads: usize,
     quality: bool,
     sequence: bool,
     mask: bool,
@@ -51,6 +89,7 @@ impl DecoderBuilder {
     pub fn new() -> Self {
         Self {
             buffer_size: 4096,
+            threads: 0,
             quality: true,
             sequence: true,
             mask: true,
@@ -99,11 +138,11 @@ impl DecoderBuilder {
 
         let rc = Rc::new(RwLock::new(reader));
         macro_rules! setup_block {
-            ($flag:expr, $use_block:expr, $rc:ident, $block:ident) => {
+            ($flag:expr, $use_block:expr, $worker:expr, $rc:ident, $block:ident) => {
                 let _length: u64;
-                setup_block!($flag, $use_block, $rc, $block, _length);
+                setup_block!($flag, $use_block, $worker, $rc, $block, _length);
             };
-            ($flag:expr, $use_block:expr, $rc:ident, $block:ident, $block_length:ident) => {
+            ($flag:expr, $use_block:expr, $worker:expr, $rc:ident, $block:ident, $block_length:ident) => {
                 let $block;
                 if $flag {
                     // create a local copy of the reader that we can access
@@ -117,31 +156,76 @@ impl DecoderBuilder {
                     let consumed = buf.len() - i.len();
                     handle.consume(consumed);
                     // setup the independent decoder for the block
-                    if $use_block {
-                        let pos = handle.stream_position()?;
-                        let tee_slice = IoSlice::new(tee, pos, pos + compressed_size);
-                        let mut decoder = zstd::stream::read::Decoder::new(tee_slice)?;
-                        decoder.include_magicbytes(false)?;
-                        $block = Some(BufReader::with_capacity(self.buffer_size, decoder));
+                    if $use_block && $worker {
+                        // load the block and decompress it in a background thread
+                        let mut data = Vec::new();
+                        handle
+                            .by_ref()
+                            .take(compressed_size)
+                            .read_to_end(&mut data)?;
+                        if data.len() as u64 != compressed_size {
+                            return Err(Error::Io(std::io::Error::new(
+                                std::io::ErrorKind::UnexpectedEof,
+                                "block is shorter than its compressed size",
+                            )));
+                        }
+                        let worker = WorkerReader::spawn(data, self.buffer_size)?;
+                        $block = Some(BlockReader::Worker(worker));
                     } else {
-                        $block = None;
+                        if $use_block {
+                            let pos = handle.stream_position()?;
+                            let tee_slice = IoSlice::new(tee, pos, pos + compressed_size);
+                            let mut decoder = zstd::stream::read::Decoder::new(tee_slice)?;
+                            decoder.include_magicbytes(false)?;
+                            let reader = BufReader::with_capacity(self.buffer_size, decoder);
+                            $block = Some(BlockReader::Stream(reader));
+                        } else {
+                            $block = None;
+                        }
+                        // skip the block with the main reader
+                        handle.seek(SeekFrom::Current(compressed_size as i64))?;
                     }
-                    // skip the block with the main reader
-                    handle.seek(SeekFrom::Current(compressed_size as i64))?;
                 } else {
                     $block = None;
                 }
             };
         }
 
+        // assign background threads to the blocks, most expensive first
         let flags = header.flags();
+        let mut threads = self.threads;
+        let mut use_worker = |used: bool| {
+            let worker = used && threads > 0;
+            threads -= worker as usize;
+            worker
+        };
+        let seq_worker = use_worker(flags.has_sequence() && self.sequence);
+        let quality_worker = use_worker(flags.has_quality() && self.quality);
+        let ids_worker = use_worker(flags.has_ids());
+        let com_worker = use_worker(flags.has_comments());
+        let mask_worker = use_worker(flags.has_mask() && self.mask && self.sequence);
+        let len_worker = use_worker(flags.has_lengths());
+
         let mut seqlen = 0;
-        setup_block!(flags.has_ids(), true, rc, ids_block);
-        setup_block!(flags.has_comments(), true, rc, com_block);
-        setup_block!(flags.has_lengths(), true, rc, len_block);
-        setup_block!(flags.has_mask(), self.mask, rc, mask_block);
-        setup_block!(flags.has_sequence(), self.sequence, rc, seq_block, seqlen);
-        setup_block!(flags.has_quality(), self.quality, rc, quality_block);
+        setup_block!(flags.has_ids(), true, ids_worker, rc, ids_block);
+        setup_block!(flags.has_comments(), true, com_worker, rc, com_block);
+        setup_block!(flags.has_lengths(), true, len_worker, rc, len_block);
+        setup_block!(flags.has_mask(), self.mask, mask_worker, rc, mask_block);
+        setup_block!(
+            flags.has_sequence(),
+            self.sequence,
+            seq_worker,
+            rc,
+            seq_block,
+            seqlen
+        );
+        setup_block!(
+            flags.has_quality(),
+            self.quality,
+            quality_worker,
+            rc,
+            quality_block
+        );
 
         Ok(Decoder {
             ids: ids_block.map(CStringReader::new),
@@ -167,6 +251,19 @@ impl DecoderBuilder {
         self
     }
 
+    /// The number of background threads to use for decompression.
+    ///
+    /// Each block of the archive is compressed independently, so they can
+    /// be decompressed in parallel. When set to a non-zero value, up to
+    /// `threads` blocks are loaded in memory and decompressed in their own
+    /// thread, starting with the largest ones (sequences and qualities).
+    /// The remaining blocks are decompressed on demand by the thread
+    /// reading the records. By default, no background thread is used.
+    pub fn threads(&mut self, threads: usize) -> &mut Self {
+        self.threads = threads;
+        self
+    }
+
     /// Whether or not to decode the sequence string if available.
     pub fn sequence(&mut self, sequence: bool) -> &mut Self {
         self.sequence = sequence;
@@ -279,43 +376,65 @@ impl<R: BufRead + Seek> Decoder<'_, R> {
             .expect("lock shouldn't be poisoned")
     }
 
+    /// Read the next record from the archive into an existing record.
+    ///
+    /// The strings of `record` are reused to store the new field values,
+    /// which avoids allocating new buffers for every record when records
+    /// are processed one at a time. Fields missing from the archive are
+    /// set to `None`. Returns `None` once all records have been read.
+    pub fn next_into(&mut self, record: &mut Record) -> Option<Result<(), Error>> {
+        if self.n as u64 >= self.header.number_of_sequences() {
+            return None;
+        }
+        Some(self.read_record(record))
+    }
+
     /// Attempt to read the next record from the archive.
     ///
     /// This function expects that a record is available; use `Decoder::next`
     /// to check beforehand whether all sequences were read from the archive.
     fn next_record(&mut self) -> Result<Record, Error> {
-        let id = self
-            .ids
-            .as_mut()
-            .and_then(|r| r.next())
-            .transpose()?
-            .map(|id| id.into_string().expect("TODO"));
-        let comment = self
-            .com
-            .as_mut()
-            .and_then(|r| r.next())
-            .transpose()?
-            .map(|com| com.into_string().expect("TODO"));
-        let length = self.len.as_mut().and_then(|r| r.next()).transpose()?;
-
-        let mut sequence = None;
-        let mut quality = None;
-        if let Some(l) = length {
-            sequence = self.seq.as_mut().map(|r| r.next(l)).transpose()?;
-            quality = self.qual.as_mut().map(|r| r.next(l)).transpose()?;
-            if let Some(mut seq) = sequence.as_mut() {
-                self.mask_sequence(&mut seq)?;
+        let mut record = Record::default();
+        self.read_record(&mut record)?;
+        Ok(record)
+    }
+
+    /// Attempt to read the next record from the archive into `record`.
+    fn read_record(&mut self, record: &mut Record) -> Result<(), Error> {
+        record.id = match self.ids.as_mut() {
+            Some(r) => r
+                .read_into(record.id.take().unwrap_or_default())
+                .transpose()?,
+            None => None,
+        };
+        record.comment = match self.com.as_mut() {
+            Some(r) => r
+                .read_into(record.comment.take().unwrap_or_default())
+                .transpose()?,
+            None => None,
+        };
+        record.length = self.len.as_mut().and_then(|r| r.next()).transpose()?;
+
+        let sequence = record.sequence.take().unwrap_or_default();
+        let quality = record.quality.take().unwrap_or_default();
+        if let Some(l) = record.length {
+            record.sequence = self
+                .seq
+                .as_mut()
+                .map(|r| r.read_into(l, sequence))
+                .transpose()?;
+            record.quality = self
+                .qual
+                .as_mut()
+                .map(|r| r.read_into(l, quality))
+                .transpose()?;
+            if let Some(seq) = record.sequence.as_mut() {
+                self.mask_sequence(seq)?;
             }
         }
 
         self.n += 1;
-        Ok(Record {
-            id,
-            comment,
-            sequence,
-            quality,
-            length,
-        })
+        Ok(())
     }
 
     /// Attempt to mask some regions of the given sequence.
@@ -328,7 +447,7 @@ impl<R: BufRead + Seek> Decoder<'_, R> {
                 match mask {
                     MaskUnit::Masked(n) => {
                         if n < seq.len() as u64 {
-                            seq[..n as usize].make_ascii_lowercase();
+                            make_ascii_lowercase(&mut seq[..n as usize]);
                             seq = &mut seq[n as usize..];
                         } else {
                             self.unit = MaskUnit::Masked(n - seq.len() as u64);
@@ -372,12 +491,34 @@ impl<R: BufRead + Seek> Iterator for Decoder<'_, R> {
 
     fn size_hint(&self) -> (usize, Option<usize>) {
         let remaining = self.header.number_of_sequences() as usize - self.n;
-        (0, Some(remaining))
+        (remaining, Some(remaining))
     }
 }
 
 impl<R: BufRead + Seek> FusedIterator for Decoder<'_, R> {}
 
+/// Convert a string to ASCII lower case in place, 8 bytes at a time.
+///
+/// Words containing only ASCII characters get their uppercase letters
+/// detected with a SWAR range check, and `0x20` added to them with a
+/// single `OR`, without branching on each byte.
+fn make_ascii_lowercase(s: &mut str) {
+    // SAFETY: only ASCII bytes are modified, and they are kept ASCII,
+    //         so the string remains valid UTF-8.
+    let bytes = unsafe { s.as_bytes_mut() };
+    let mut chunks = bytes.chunks_exact_mut(swar::LANES);
+    for chunk in chunks.by_ref() {
+        let word = u64::from_le_bytes((&*chunk).try_into().unwrap());
+        if swar::is_ascii(word) {
+            let upper = swar::ascii_range(word, b'A', b'Z');
+            chunk.copy_from_slice(&(word | (upper >> 2)).to_le_bytes());
+        } else {
+            chunk.make_ascii_lowercase();
+        }
+    }
+    chunks.into_remainder().make_ascii_lowercase();
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -422,6 +563,20 @@ mod tests {
         );
     }
 
+    #[test]
+    fn ascii_lowercase() {
+        for text in [
+            "",
+            "ACGT",
+            "ACGTNNNNacgtnnnnACGT-*",
+            "@AZ[`az{ACGTÀÉÎÕÜacgtMNOPQRSTUVWXYZ",
+        ] {
+            let mut s = text.to_string();
+            make_ascii_lowercase(&mut s);
+            assert_eq!(s, text.to_ascii_lowercase());
+        }
+    }
+
     #[test]
     fn skip_sequence() {
         let decoder = DecoderBuilder::new()
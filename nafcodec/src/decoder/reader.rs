@@ -3,6 +3,7 @@ use std::io::BufRead;
 
 use crate::data::MaskUnit;
 use crate::data::SequenceType;
+use crate::error::Error;
 
 // --- CStringReader -----------------------------------------------------------
 
@@ -15,6 +16,22 @@ impl<R: BufRead> CStringReader<R> {
     pub fn new(reader: R) -> Self {
         Self { reader }
     }
+
+    /// Read the next string, reusing the allocation of `buffer`.
+    pub fn read_into(&mut self, buffer: String) -> Option<Result<String, Error>> {
+        let mut bytes = buffer.into_bytes();
+        bytes.clear();
+        match self.reader.read_until(0, &mut bytes) {
+            Ok(0) => None,
+            Err(e) => Some(Err(Error::Io(e))),
+            Ok(_) => {
+                if bytes.last() == Some(&0) {
+                    bytes.pop();
+                }
+                Some(String::from_utf8(bytes).map_err(Error::from))
+            }
+        }
+    }
 }
 
 impl<R: BufRead> Iterator for CStringReader<R> {
@@ -85,10 +102,13 @@ impl<R: BufRead> SequenceReader<R> {
         }
     }
 
-    pub fn next(&mut self, length: u64) -> Result<String, std::io::Error> {
+    /// Read the next sequence, reusing the allocation of `buffer`.
+    pub fn read_into(&mut self, length: u64, buffer: String) -> Result<String, std::io::Error> {
         let l = length as usize;
         if self.ty.is_nucleotide() {
-            let mut sequence = String::with_capacity(l);
+            let mut sequence = buffer;
+            sequence.clear();
+            sequence.reserve(l);
             if self.cache.is_some() && l > 0 {
                 sequence.push(self.cache.take().unwrap());
             }
@@ -101,7 +121,9 @@ impl<R: BufRead> SequenceReader<R> {
             }
             Ok(sequence)
         } else {
-            let mut sequence = Vec::with_capacity(l);
+            let mut sequence = buffer.into_bytes();
+            sequence.clear();
+            sequence.reserve(l);
             while sequence.len() < l {
                 self.read_text(l, &mut sequence)?;
             }
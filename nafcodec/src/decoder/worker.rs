@@ -0,0 +1,139 @@
+use std::io::BufRead;
+use std::io::Cursor;
+use std::io::Error as IoError;
+use std::io::Read;
+use std::sync::mpsc::Receiver;
+use std::sync::mpsc::SyncSender;
+
+/// The number of decompressed chunks a worker can get ahead of the reader.
+const CHANNEL_CAPACITY: usize = 64;
+
+/// A reader for a block decompressed in a background thread.
+///
+/// The compressed block is loaded in memory and moved to a dedicated
+/// thread, which sends the decompressed data in chunks through a bounded
+/// channel. The thread exits once the block is exhausted, or as soon as
+/// the reader is dropped. After a decompression error, every subsequent
+/// read fails as well.
+#[derive(Debug)]
+pub struct WorkerReader {
+    receiver: Receiver<Result<Vec<u8>, IoError>>,
+    chunk: Vec<u8>,
+    pos: usize,
+    failed: bool,
+}
+
+impl WorkerReader {
+    /// Start decompressing the given block in a new thread.
+    pub fn spawn(block: Vec<u8>, chunk_size: usize) -> Result<Self, IoError> {
+        let mut decoder = zstd::stream::read::Decoder::with_buffer(Cursor::new(block))?;
+        decoder.include_magicbytes(false)?;
+
+        let (sender, receiver) = std::sync::mpsc::sync_channel(CHANNEL_CAPACITY);
+        std::thread::Builder::new()
+            .name(String::from("nafcodec-worker"))
+            .spawn(move || Self::run(decoder, sender, chunk_size.max(1)))?;
+
+        Ok(Self {
+            receiver,
+            chunk: Vec::new(),
+            pos: 0,
+            failed: false,
+        })
+    }
+
+    fn run<R: Read>(mut decoder: R, sender: SyncSender<Result<Vec<u8>, IoError>>, size: usize) {
+        loop {
+            let mut chunk = vec![0; size];
+            match decoder.read(&mut chunk) {
+                Ok(0) => break,
+                Ok(n) => {
+                    chunk.truncate(n);
+                    if sender.send(Ok(chunk)).is_err() {
+                        break;
+                    }
+                }
+                Err(e) if e.kind() == std::io::ErrorKind::Interrupted => continue,
+                Err(e) => {
+                    let _ = sender.send(Err(e));
+                    break;
+                }
+            }
+        }
+    }
+}
+
+impl Read for WorkerReader {
+    fn read(&mut self, buf: &mut [u8]) -> Result<usize, IoError> {
+        let available = self.fill_buf()?;
+        let n = buf.len().min(available.len());
+        buf[..n].copy_from_slice(&available[..n]);
+        self.consume(n);
+        Ok(n)
+    }
+}
+
+impl BufRead for WorkerReader {
+    fn fill_buf(&mut self) -> Result<&[u8], IoError> {
+        if self.pos >= self.chunk.len() {
+            // discard the consumed chunk first so it is never served twice,
+            // even if receiving the next one fails
+            self.chunk.clear();
+            self.pos = 0;
+            if self.failed {
+                return Err(IoError::new(
+                    std::io::ErrorKind::Other,
+                    "block decompression failed",
+                ));
+            }
+            match self.receiver.recv() {
+                Ok(Ok(chunk)) => self.chunk = chunk,
+                Ok(Err(e)) => {
+                    self.failed = true;
+                    return Err(e);
+                }
+                // the sender was dropped, meaning the block was fully read
+                Err(_) => (),
+            }
+        }
+        Ok(&self.chunk[self.pos..])
+    }
+
+    fn consume(&mut self, amt: usize) {
+        self.pos = (self.pos + amt).min(self.chunk.len());
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn corrupt_block() {
+        let data = (0..100_000u32)
+            .flat_map(|i| i.to_le_bytes())
+            .collect::<Vec<u8>>();
+        let mut block = zstd::stream::encode_all(data.as_slice(), 0).unwrap();
+        // strip the magic bytes and corrupt the end of the frame
+        block.drain(..4);
+        let n = block.len();
+        block[n / 2..].iter_mut().for_each(|x| *x = !*x);
+
+        let mut reader = WorkerReader::spawn(block, 1024).unwrap();
+        let mut decoded = Vec::new();
+        let mut buf = [0; 512];
+        loop {
+            match reader.read(&mut buf) {
+                Ok(0) => panic!("unexpected end of block"),
+                Ok(n) => decoded.extend_from_slice(&buf[..n]),
+                Err(_) => break,
+            }
+        }
+        assert!(decoded.len() < data.len());
+        assert_eq!(decoded.as_slice(), &data[..decoded.len()]);
+        // the reader must keep failing rather than report the end of block
+        for _ in 0..3 {
+            assert!(reader.read(&mut buf).is_err());
+        }
+    }
+}
@@ -7,6 +7,8 @@ mod decoder;
 mod encoder;
 
 pub mod error;
+#[doc(hidden)]
+pub mod swar;
 
 pub use self::data::Flags;
 pub use self::data::FormatVersion;
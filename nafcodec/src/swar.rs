@@ -0,0 +1,70 @@
+//! SWAR (SIMD within a register) helpers for byte-level scanning.
+//!
+//! These functions process sequence data in 64-bit words, examining 8
+//! bytes at a time with plain integer operations, which keeps the code
+//! portable while avoiding per-character branches.
+//!
+//! This module is only public so that it can be shared with `nafcodec-py`,
+//! and is not part of the stable API of this crate.
+
+/// The number of bytes processed in a single word.
+pub const LANES: usize = std::mem::size_of::<u64>();
+
+/// A word with all bytes set to `0x01`.
+pub const LO: u64 = u64::from_ne_bytes([0x01; LANES]);
+/// A word with all bytes set to `0x7F`.
+pub const MID: u64 = u64::from_ne_bytes([0x7F; LANES]);
+/// A word with all bytes set to `0x80`.
+pub const HI: u64 = u64::from_ne_bytes([0x80; LANES]);
+
+/// Broadcast a single byte to all the bytes of a word.
+#[inline]
+pub const fn splat(byte: u8) -> u64 {
+    LO * byte as u64
+}
+
+/// Check whether all the bytes of `x` are ASCII.
+#[inline]
+pub const fn is_ascii(x: u64) -> bool {
+    x & HI == 0
+}
+
+/// Get a word with the high bit set in every byte of `x` equal to zero.
+#[inline]
+pub const fn zero_bytes(x: u64) -> u64 {
+    !(((x & MID) + MID) | x) & HI
+}
+
+/// Get a word with the high bit set in every byte of `x` within `lo..=hi`.
+///
+/// All bytes of `x` must be ASCII, otherwise the result is meaningless.
+#[inline]
+pub const fn ascii_range(x: u64, lo: u8, hi: u8) -> u64 {
+    let ge = x + splat(0x80 - lo);
+    let gt = x + splat(0x7F - hi);
+    ge & !gt & HI
+}
+
+/// Gather the high bit of every byte of `x` into a single byte.
+#[inline]
+pub const fn movemask(x: u64) -> u8 {
+    (((x & HI) >> 7).wrapping_mul(0x0102040810204080) >> 56) as u8
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn zero_bytes() {
+        let word = u64::from_le_bytes(*b"A\0C\0\0TG\0");
+        assert_eq!(movemask(super::zero_bytes(word)), 0b10011010);
+    }
+
+    #[test]
+    fn ascii_range() {
+        let word = u64::from_le_bytes(*b"AZaz@[`{");
+        assert_eq!(movemask(super::ascii_range(word, b'A', b'Z')), 0b00000011);
+        assert_eq!(movemask(super::ascii_range(word, b'a', b'z')), 0b00001100);
+    }
+}
@@ -1,5 +1,6 @@
 use nafcodec::Decoder;
 use nafcodec::DecoderBuilder;
+use nafcodec::Record;
 use nafcodec::SequenceType;
 
 const GENOME: &[u8] = include_bytes!("../../data/NZ_AAEN01000029.naf");
@@ -84,3 +85,20 @@ fn force_nomask() {
 
     assert!(decoder.next().is_none());
 }
+
+#[test]
+fn next_into() {
+    let expected = Decoder::new(std::io::Cursor::new(MASKED))
+        .unwrap()
+        .collect::<Result<Vec<_>, _>>()
+        .unwrap();
+
+    let c = std::io::Cursor::new(MASKED);
+    let mut decoder = Decoder::new(c).unwrap();
+    let mut record = Record::default();
+    for r in expected.iter() {
+        decoder.next_into(&mut record).unwrap().unwrap();
+        assert_eq!(&record, r);
+    }
+    assert!(decoder.next_into(&mut record).is_none());
+}
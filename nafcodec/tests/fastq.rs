@@ -1,4 +1,6 @@
+use nafcodec::error::Error;
 use nafcodec::Decoder;
+use nafcodec::DecoderBuilder;
 use nafcodec::SequenceType;
 
 #[test]
@@ -13,6 +15,7 @@ fn decode() {
     assert_eq!(decoder.header().sequence_type(), SequenceType::Dna);
     assert!(decoder.header().flags().has_quality());
     assert!(decoder.header().flags().has_sequence());
+    assert_eq!(decoder.size_hint(), (42, Some(42)));
 
     let r1 = decoder.next().unwrap().unwrap();
     assert_eq!(r1.id.unwrap(), "SRR1377138.1");
@@ -28,7 +31,47 @@ fn decode() {
     let r2 = decoder.next().unwrap().unwrap();
     assert_eq!(r2.id.unwrap(), "SRR1377138.2");
     assert_eq!(r2.comment.unwrap(), "some lowercase nucleotides");
+    assert_eq!(decoder.size_hint(), (40, Some(40)));
 
     let records = decoder.collect::<Result<Vec<_>, _>>().unwrap();
     assert_eq!(records.len(), 40);
 }
+
+#[test]
+fn decode_threads() {
+    const ARCHIVE: &[u8] = include_bytes!("../../data/phix.naf");
+
+    let c = std::io::Cursor::new(ARCHIVE);
+    let expected = Decoder::new(c)
+        .unwrap()
+        .collect::<Result<Vec<_>, _>>()
+        .unwrap();
+
+    for threads in 1..=6 {
+        let c = std::io::Cursor::new(ARCHIVE);
+        let decoder = DecoderBuilder::new()
+            .threads(threads)
+            .from_reader(c)
+            .unwrap();
+        let records = decoder.collect::<Result<Vec<_>, _>>().unwrap();
+        assert_eq!(records, expected);
+    }
+}
+
+#[test]
+fn decode_threads_corrupt_size() {
+    const ARCHIVE: &[u8] = include_bytes!("../../data/phix.naf");
+
+    // replace the compressed size of the identifiers block with 1 TiB
+    let mut archive = ARCHIVE[..11].to_vec();
+    assert_eq!(&ARCHIVE[11..13], &[0x81, 0x0D]);
+    archive.extend_from_slice(&[0xA0, 0x80, 0x80, 0x80, 0x80, 0x00]);
+    archive.extend_from_slice(&ARCHIVE[13..]);
+
+    let c = std::io::Cursor::new(archive);
+    match DecoderBuilder::new().threads(6).from_reader(c) {
+        Ok(_decoder) => panic!("unexpected success"),
+        Err(Error::Io(e)) => assert_eq!(e.kind(), std::io::ErrorKind::UnexpectedEof),
+        Err(e) => panic!("unexpected error: {:?}", e),
+    }
+}